@@ -1,5 +1,20 @@
+from collections import deque
+from contextlib import contextmanager
 from dataclasses import Field
-from typing import Any, Dict, Iterable, List, Literal, Optional, Tuple, Union
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+from weakref import WeakValueDictionary
 
 import y_py as Y
 from pydantic import BaseModel, Field
@@ -25,12 +40,68 @@ class Event(BaseModel):
     deltas: List[Delta]
 
 
+# Observers see deltas straight from the y_py extension, so there is nothing to
+# validate. These unvalidated mirrors of Delta / Event are what bindings build on the
+# hot path; the Pydantic models above stay around for serialization at API boundaries.
+class _DeltaFast(NamedTuple):
+    insert: Optional[Any]
+    retain: Optional[int]
+    delete: Optional[int]
+    attributes: dict
+
+
+class _EventFast(NamedTuple):
+    deltas: List[_DeltaFast]
+
+
+def _fast_event(deltas: List[dict]) -> _EventFast:
+    return _EventFast(
+        [
+            _DeltaFast(
+                d.get("insert"),
+                d.get("retain"),
+                d.get("delete"),
+                d.get("attributes") or {},
+            )
+            for d in deltas
+        ]
+    )
+
+
+# JSON encoders for bindings nested inside ArrayModel / MapModel. TextModel.dict()
+# builds its items as plain builtins already, and collections are returned shallow,
+# since any bindings nested further down are picked up by the json encoder calling
+# back into these.
+def _encode_collection_binding(v: Union["ArrayBinding", "MapBinding"]) -> dict:
+    return {"items": v.model.items, "deleted": v.model.deleted}
+
+
 Y_PYDANTIC_JSON_ENCODERS = {
     "TextBinding": lambda v: v.model.dict(),
-    "ArrayBinding": lambda v: v.model.dict(),
-    "MapBinding": lambda v: v.model.dict(),
+    "ArrayBinding": _encode_collection_binding,
+    "MapBinding": _encode_collection_binding,
 }
 
+# Transactions opened by a binding's batch(), keyed by id() of their YDoc. y_py lets a
+# second transaction open on a doc while one is still active, and the deltas observed
+# for the two then overlap, so bindings reuse the open transaction for their doc.
+_OPEN_TRANSACTIONS: Dict[int, Y.YTransaction] = {}
+
+
+@contextmanager
+def _transaction(doc: Y.YDoc) -> Iterator[Y.YTransaction]:
+    txn = _OPEN_TRANSACTIONS.get(id(doc))
+    if txn is not None:
+        yield txn
+        return
+    with doc.begin_transaction() as txn:
+        _OPEN_TRANSACTIONS[id(doc)] = txn
+        try:
+            yield txn
+        finally:
+            del _OPEN_TRANSACTIONS[id(doc)]
+
+
 #
 # Model and Binding to a Y.YText object
 #
@@ -44,6 +115,31 @@ class TextItem(BaseModel):
     attributes: Optional[dict] = Field(default_factory=dict)
 
 
+class _Attrs(dict):
+    # Plain dicts can't be weakly referenced, this subclass can
+    __slots__ = ("__weakref__",)
+
+
+# Attribute dicts shared by every item with the same formatting, across all bindings.
+# Entries drop out once no item refers to them anymore.
+_ATTRS_CACHE: "WeakValueDictionary[frozenset, _Attrs]" = WeakValueDictionary()
+
+
+def _intern_attrs(attrs: Optional[dict]) -> Optional[dict]:
+    if not attrs:
+        return None
+    try:
+        # Include the type so that e.g. True and 1.0 don't intern to the same dict
+        key = frozenset((k, type(v), v) for k, v in attrs.items())
+    except TypeError:
+        # Unhashable attribute values (list / dict), don't share this one
+        return _Attrs(attrs)
+    shared = _ATTRS_CACHE.get(key)
+    if shared is None:
+        shared = _ATTRS_CACHE[key] = _Attrs(attrs)
+    return shared
+
+
 class TextModel(BaseModel):
     items: List[TextItem] = Field(default_factory=list)
     deleted: List[TextItem] = Field(default_factory=list)
@@ -52,43 +148,128 @@ class TextModel(BaseModel):
     def plain_text(self) -> str:
         return "".join(item.value for item in self.items if isinstance(item.value, str))
 
-    def apply_event(self, event: Event):
+    def apply_event(self, event: Union[Event, _EventFast]):
         """
         Update the TextModel after observing a YTextEvent.
+
+        Deltas come from the y_py CRDT and are trusted, so TextItems are built with
+        .construct() to skip Pydantic validation on every inserted character.
         """
         idx = 0
         for delta in event.deltas:
             if delta.insert:
                 # Make copies of the attributes dict below otherwise each inserted item
-                # will have the same reference and future updates will update all items
+                # will have the same reference and future updates will update all items.
+                # Unformatted inserts skip the copy and just get a fresh empty dict.
+                attrs = delta.attributes
+                need_copy = bool(attrs)
                 if isinstance(delta.insert, str):
-                    for c in delta.insert:
-                        item = TextItem(value=c, attributes=delta.attributes.copy())
-                        try:
-                            self.items.insert(idx, item)
-                        except IndexError:
-                            self.items.append(item)
-                        idx += 1
+                    # Splice the whole run in at once, rather than shifting the list
+                    # once per inserted character
+                    batch = [
+                        TextItem.construct(
+                            value=c, attributes=(attrs.copy() if need_copy else {})
+                        )
+                        for c in delta.insert
+                    ]
+                    self.items[idx:idx] = batch
+                    idx += len(batch)
 
                 else:
-                    item = TextItem(
-                        value=delta.insert, attributes=delta.attributes.copy()
+                    item = TextItem.construct(
+                        value=delta.insert,
+                        attributes=(attrs.copy() if need_copy else {}),
                     )
-                    try:
-                        self.items.insert(idx, item)
-                    except IndexError:
-                        self.items.append(item)
+                    self.items.insert(idx, item)
                     idx += 1
 
             elif delta.retain:
-                for _ in range(delta.retain):
-                    self.items[idx].attributes.update(delta.attributes)
+                # A retain without attributes is just moving the cursor forward
+                if delta.attributes:
+                    attrs_items = list(delta.attributes.items())
+                    for i in range(idx, idx + delta.retain):
+                        self.items[i].attributes.update(attrs_items)
+                idx += delta.retain
+
+            elif delta.delete:
+                end = idx + delta.delete
+                self.deleted.extend(self.items[idx:end])
+                del self.items[idx:end]
+
+
+class _TextStore:
+    """
+    Live state of a TextBinding's text, kept as parallel lists rather than one TextItem
+    per character: the value of each item, its attributes (None when unformatted), and
+    its character ("" for embeds) so that plain_text is a single join.
+
+    Attribute dicts are interned and never mutated in place, so every item with the
+    same formatting shares a single dict.
+    """
+
+    def __init__(self):
+        self.values: List[Any] = []
+        self.attrs: List[Optional[dict]] = []
+        self.chars: List[str] = []
+        self.deleted: List[TextItem] = []
+
+    def item(self, idx: int) -> TextItem:
+        attrs = self.attrs[idx]
+        return TextItem.construct(
+            value=self.values[idx], attributes=dict(attrs) if attrs else {}
+        )
+
+    def to_model(self) -> TextModel:
+        items = [
+            TextItem.construct(value=value, attributes=dict(attrs) if attrs else {})
+            for value, attrs in zip(self.values, self.attrs)
+        ]
+        # Leave the fields unset, the same as a TextModel() updated through apply_event
+        return TextModel.construct(
+            _fields_set=set(), items=items, deleted=list(self.deleted)
+        )
+
+    def apply_event(self, event: _EventFast):
+        idx = 0
+        for delta in event.deltas:
+            if delta.insert:
+                attrs = _intern_attrs(delta.attributes)
+                if isinstance(delta.insert, str):
+                    # Splice the whole run in at once, rather than shifting the lists
+                    # once per inserted character
+                    chars = list(delta.insert)
+                    self.values[idx:idx] = chars
+                    self.chars[idx:idx] = chars
+                    self.attrs[idx:idx] = [attrs] * len(chars)
+                    idx += len(chars)
+
+                else:
+                    self.values.insert(idx, delta.insert)
+                    self.chars.insert(idx, "")
+                    self.attrs.insert(idx, attrs)
                     idx += 1
 
+            elif delta.retain:
+                # A retain without attributes is just moving the cursor forward
+                if delta.attributes:
+                    # Attribute dicts are shared, so swap in the interned merge instead
+                    # of updating in place. Only merge once per distinct dict in the run.
+                    merged = {}
+                    for i in range(idx, idx + delta.retain):
+                        old = self.attrs[i]
+                        if id(old) not in merged:
+                            # Hold on to old so its id can't be reused mid-loop
+                            new = _intern_attrs({**(old or {}), **delta.attributes})
+                            merged[id(old)] = (old, new)
+                        self.attrs[i] = merged[id(old)][1]
+                idx += delta.retain
+
             elif delta.delete:
-                for _ in range(delta.delete):
-                    item = self.items.pop(idx)
-                    self.deleted.append(item)
+                end = idx + delta.delete
+                self.deleted.extend(self.item(i) for i in range(idx, end))
+                del self.values[idx:end]
+                del self.attrs[idx:end]
+                del self.chars[idx:end]
 
 
 class TextBinding:
@@ -98,54 +279,113 @@ class TextBinding:
     with other documents.
     """
 
-    def __init__(self, parent_doc: Y.YDoc, ytext: Y.YText):
+    def __init__(self, parent_doc: Y.YDoc, ytext: Y.YText, event_history: int = 0):
         self.doc = parent_doc
         self.ytext = ytext
         self.ytext.observe(self.obs)
-        self.model = TextModel()
-        self.events: List[Event] = []
+        self._store = _TextStore()
+        self._model: Optional[TextModel] = None
+        # Only the most recent `event_history` events are kept, 0 disables recording
+        self.events: Deque[_EventFast] = deque(maxlen=event_history)
 
     def obs(self, event: Y.YTextEvent):
-        ev = Event(deltas=event.delta)
-        self.events.append(ev)
-        self.model.apply_event(ev)
+        # y_py calls this once per transaction with the deltas of every change made in
+        # it already coalesced, so each transaction is applied in a single pass
+        ev = _fast_event(event.delta)
+        if self.events.maxlen:
+            self.events.append(ev)
+        self._store.apply_event(ev)
+        self._model = None
+
+    @property
+    def model(self) -> TextModel:
+        """
+        TextModel of the current text. It's built from the binding's internal store the
+        first time it's accessed after a change, and cached until the next change
+        replaces it.
+        """
+        if self._model is None:
+            self._model = self._store.to_model()
+        return self._model
 
     @property
     def plain_text(self) -> str:
-        return self.model.plain_text
+        return "".join(self._store.chars)
+
+    @contextmanager
+    def batch(self) -> Iterator["_TextOps"]:
+        """
+        Open a single transaction for several edits, instead of one per method call.
+        Binding methods called on the same doc while the batch is open, including
+        nested batch() calls, join its transaction rather than opening a new one.
+
+        with binding.batch() as ops:
+            ops.insert(0, "foo")
+            ops.format(0, 3, {"bold": True})
+        """
+        with _transaction(self.doc) as txn:
+            yield _TextOps(self.ytext, txn)
 
     # Cover all the same methods in YText object, with the convenience of automatically
     # entering into the parent doc transaction to apply them.
     def insert(self, index: int, chunk: str, attributes: Optional[dict] = None):
-        with self.doc.begin_transaction() as txn:
-            self.ytext.insert(txn, index=index, chunk=chunk, attributes=attributes)
+        with self.batch() as ops:
+            ops.insert(index, chunk, attributes)
 
     def insert_embed(self, index: int, embed: Any, attributes: Optional[dict] = None):
-        with self.doc.begin_transaction() as txn:
-            self.ytext.insert_embed(
-                txn, index=index, embed=embed, attributes=attributes
-            )
+        with self.batch() as ops:
+            ops.insert_embed(index, embed, attributes)
 
     def extend(self, chunk: str):
-        with self.doc.begin_transaction() as txn:
-            self.ytext.extend(txn, chunk=chunk)
+        with self.batch() as ops:
+            ops.extend(chunk)
 
     def format(self, index: int, length: int, attributes: Optional[dict] = None):
-        with self.doc.begin_transaction() as txn:
-            self.ytext.format(txn, index=index, length=length, attributes=attributes)
+        with self.batch() as ops:
+            ops.format(index, length, attributes)
 
     def delete(self, index: int):
-        with self.doc.begin_transaction() as txn:
-            self.ytext.delete(txn, index=index)
+        with self.batch() as ops:
+            ops.delete(index)
 
     def delete_range(self, index: int, length: int):
-        with self.doc.begin_transaction() as txn:
-            self.ytext.delete_range(txn, index=index, length=length)
+        with self.batch() as ops:
+            ops.delete_range(index, length)
 
     def __repr__(self):
         return f"<TextBinding {self.plain_text}>"
 
 
+class _TextOps:
+    """
+    YText methods bound to an already open transaction, see TextBinding.batch()
+    """
+
+    def __init__(self, ytext: Y.YText, txn: Y.YTransaction):
+        self.ytext = ytext
+        self.txn = txn
+
+    def insert(self, index: int, chunk: str, attributes: Optional[dict] = None):
+        self.ytext.insert(self.txn, index=index, chunk=chunk, attributes=attributes)
+
+    def insert_embed(self, index: int, embed: Any, attributes: Optional[dict] = None):
+        self.ytext.insert_embed(
+            self.txn, index=index, embed=embed, attributes=attributes
+        )
+
+    def extend(self, chunk: str):
+        self.ytext.extend(self.txn, chunk=chunk)
+
+    def format(self, index: int, length: int, attributes: Optional[dict] = None):
+        self.ytext.format(self.txn, index=index, length=length, attributes=attributes)
+
+    def delete(self, index: int):
+        self.ytext.delete(self.txn, index=index)
+
+    def delete_range(self, index: int, length: int):
+        self.ytext.delete_range(self.txn, index=index, length=length)
+
+
 #
 # Model and Binding to a Y.YArray object
 #
@@ -158,70 +398,109 @@ class ArrayModel(BaseModel):
 
 
 class ArrayBinding:
-    def __init__(self, parent_doc: Y.YDoc, yarray: Y.YArray):
+    def __init__(self, parent_doc: Y.YDoc, yarray: Y.YArray, event_history: int = 0):
         self.doc = parent_doc
         self.yarray = yarray
         self.yarray.observe(self.obs)
         self.model = ArrayModel()
-        self.events: List[Event]
+        # Only the most recent `event_history` events are kept, 0 disables recording
+        self.events: Deque[_EventFast] = deque(maxlen=event_history)
 
     def obs(self, event: Y.YArrayEvent):
-        ev = Event(deltas=event.delta)
+        ev = _fast_event(event.delta)
+        if self.events.maxlen:
+            self.events.append(ev)
         idx = 0
         for delta in ev.deltas:
             if delta.insert:
-                for item in delta.insert:
-                    # Cast YText / YArray / YMap to bindings
-                    if isinstance(item, Y.YText):
-                        item = TextBinding(parent_doc=self.doc, ytext=item)
-                    elif isinstance(item, Y.YArray):
-                        item = ArrayBinding(parent_doc=self.doc, yarray=item)
-                    elif isinstance(item, Y.YMap):
-                        item = MapBinding(parent_doc=self.doc, ymap=item)
-                    try:
-                        self.model.items.insert(idx, item)
-                    except IndexError:
-                        self.model.items.append(item)
-                    idx += 1
+                # Splice the whole batch in at once rather than one list.insert per item
+                batch = [_cast(self.doc, item) for item in delta.insert]
+                self.model.items[idx:idx] = batch
+                idx += len(batch)
             elif delta.retain:
                 idx += delta.retain
             elif delta.delete:
-                for _ in range(delta.delete):
-                    self.model.deleted.append(self.model.items.pop(idx))
+                end = idx + delta.delete
+                self.model.deleted.extend(self.model.items[idx:end])
+                del self.model.items[idx:end]
+
+    @contextmanager
+    def batch(self) -> Iterator["_ArrayOps"]:
+        """
+        Open a single transaction for several edits, instead of one per method call.
+        Binding methods called on the same doc while the batch is open, including
+        nested batch() calls, join its transaction rather than opening a new one.
+
+        with binding.batch() as ops:
+            ops.append(1)
+            ops.extend([2, 3])
+        """
+        with _transaction(self.doc) as txn:
+            yield _ArrayOps(self.yarray, txn)
 
     # Cover all the same methods in YArray object, with the convenience of automatically
     # entering into the parent doc transaction to apply them.
     def insert(self, index: int, item: Any):
-        with self.doc.begin_transaction() as txn:
-            self.yarray.insert(txn, index=index, item=item)
+        with self.batch() as ops:
+            ops.insert(index, item)
 
     def insert_range(self, index: int, items: Iterable):
-        with self.doc.begin_transaction() as txn:
-            self.yarray.insert_range(txn, index=index, items=items)
+        with self.batch() as ops:
+            ops.insert_range(index, items)
 
     def append(self, item: Any):
-        with self.doc.begin_transaction() as txn:
-            self.yarray.append(txn, item=item)
+        with self.batch() as ops:
+            ops.append(item)
 
     def extend(self, items: Iterable):
-        with self.doc.begin_transaction() as txn:
-            self.yarray.extend(txn, items=items)
+        with self.batch() as ops:
+            ops.extend(items)
 
     def delete(self, index: int):
-        with self.doc.begin_transaction() as txn:
-            self.yarray.delete(txn, index=index)
+        with self.batch() as ops:
+            ops.delete(index)
 
     def delete_range(self, index: int, length: int):
-        with self.doc.begin_transaction() as txn:
-            self.yarray.delete_range(txn, index=index, length=length)
+        with self.batch() as ops:
+            ops.delete_range(index, length)
 
     def __repr__(self):
         return f"<ArrayBinding {len(self.model.items)}>"
 
 
+class _ArrayOps:
+    """
+    YArray methods bound to an already open transaction, see ArrayBinding.batch()
+    """
+
+    def __init__(self, yarray: Y.YArray, txn: Y.YTransaction):
+        self.yarray = yarray
+        self.txn = txn
+
+    def insert(self, index: int, item: Any):
+        self.yarray.insert(self.txn, index=index, item=item)
+
+    def insert_range(self, index: int, items: Iterable):
+        self.yarray.insert_range(self.txn, index=index, items=items)
+
+    def append(self, item: Any):
+        self.yarray.append(self.txn, item=item)
+
+    def extend(self, items: Iterable):
+        self.yarray.extend(self.txn, items=items)
+
+    def delete(self, index: int):
+        self.yarray.delete(self.txn, index=index)
+
+    def delete_range(self, index: int, length: int):
+        self.yarray.delete_range(self.txn, index=index, length=length)
+
+
 #
 # Model and Binding to a Y.YMap object
 #
+# KeyChange / MapEvent are typed views of Y.YMapEvent.keys for API boundaries,
+# MapBinding.obs reads the y_py dicts directly and never builds them.
 class KeyChange(BaseModel):
     action: Literal["add", "update", "delete"]
     oldValue: Optional[Any] = None
@@ -236,52 +515,71 @@ class MapModel(BaseModel):
     items: Dict[str, Any] = Field(default_factory=dict)
     deleted: Dict[str, Any] = Field(default_factory=dict)
 
+    class Config:
+        json_encoders = Y_PYDANTIC_JSON_ENCODERS
+
 
 class MapBinding:
-    def __init__(self, parent_doc: Y.YDoc, ymap: Y.YMap):
+    def __init__(self, parent_doc: Y.YDoc, ymap: Y.YMap, event_history: int = 0):
         self.doc = parent_doc
         self.ymap = ymap
         self.ymap.observe(self.obs)
         self.model = MapModel()
-        self.events: List[Event]
+        # Only the most recent `event_history` events are kept, 0 disables recording
+        self.events: Deque[Dict[str, dict]] = deque(maxlen=event_history)
 
     def obs(self, event: Y.YMapEvent):
-        ev = MapEvent(keys=event.keys)
-        for key, change in ev.keys.items():
-            if change.action == "delete":
+        # event.keys is already a dict of {key: {"action": ..., "newValue": ...}} from
+        # y_py, so read it directly instead of validating it through MapEvent
+        keys = event.keys
+        if self.events.maxlen:
+            self.events.append(keys)
+        for key, change in keys.items():
+            action = change["action"]
+            if action == "delete":
                 self.model.deleted[key] = self.model.items.pop(key)
             else:
-                # Cast YText / YArray / YMap to bindings
-                if isinstance(change.newValue, Y.YText):
-                    change.newValue = TextBinding(
-                        parent_doc=self.doc, ytext=change.newValue
-                    )
-                elif isinstance(change.newValue, Y.YArray):
-                    change.newValue = ArrayBinding(
-                        parent_doc=self.doc, yarray=change.newValue
-                    )
-                elif isinstance(change.newValue, Y.YMap):
-                    change.newValue = MapBinding(
-                        parent_doc=self.doc, ymap=change.newValue
-                    )
-                if change.action == "add":
-                    self.model.items[key] = change.newValue
-                elif change.action == "update":
-                    self.model.items[key] = change.newValue
+                value = _cast(self.doc, change.get("newValue"))
+                if action == "add":
+                    self.model.items[key] = value
+                elif action == "update":
+                    self.model.items[key] = value
 
     # Cover all the same methods in YMap object, with the convenience of automatically
     # entering into the parent doc transaction to apply them.
     def set(self, key: str, value: Any):
-        with self.doc.begin_transaction() as txn:
+        with _transaction(self.doc) as txn:
             self.ymap.set(txn, key=key, value=value)
 
     def update(self, items: Union[Iterable[Tuple[str, Any]], Dict[str, Any]]):
-        with self.doc.begin_transaction() as txn:
+        with _transaction(self.doc) as txn:
             self.ymap.update(txn, items=items)
 
     def pop(self, key: str, fallback: Optional[Any] = None) -> Any:
-        with self.doc.begin_transaction() as txn:
+        with _transaction(self.doc) as txn:
             return self.ymap.pop(txn, key=key, fallback=fallback)
 
     def __repr__(self):
         return f"<MapBinding {len(self.model.items)}>"
+
+
+#
+# Cast YText / YArray / YMap values observed inside other shared types to bindings.
+# An exact type lookup is one hash instead of an isinstance chain per item.
+#
+_WRAPPERS = {
+    Y.YText: lambda doc, x: TextBinding(parent_doc=doc, ytext=x),
+    Y.YArray: lambda doc, x: ArrayBinding(parent_doc=doc, yarray=x),
+    Y.YMap: lambda doc, x: MapBinding(parent_doc=doc, ymap=x),
+}
+
+
+def _cast(doc: Y.YDoc, item: Any) -> Any:
+    wrap = _WRAPPERS.get(type(item))
+    return wrap(doc, item) if wrap else item
+
+
+# Y_PYDANTIC_JSON_ENCODERS is keyed by binding class names, which pydantic can only
+# resolve once those classes exist, so resolve them now for the models that use it
+ArrayModel.update_forward_refs()
+MapModel.update_forward_refs()
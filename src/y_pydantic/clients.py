@@ -1,7 +1,10 @@
-from typing import List
+from typing import List, Optional
 
 import y_py as Y
 
+# Encoding y_py produces for an update with no changes
+_EMPTY_UPDATE = b"\x00\x00"
+
 
 class SyncClient:
     def __init__(self, pool: "ClientPool"):
@@ -10,15 +13,30 @@ class SyncClient:
         self.doc.observe_after_transaction(self.sync)
 
     def sync(self, event: Y.AfterTransactionEvent):
+        # Diffs the pool is applying to us have already been sent to everyone else,
+        # so don't broadcast them again
+        if self.pool.receiving is self:
+            return
         diff = event.get_update()
-        if diff != b"\x00\x00":
-            self.pool.sync(diff)
+        if diff != _EMPTY_UPDATE:
+            self.pool.sync(diff, origin=self)
 
 
 class ClientPool:
+    """
+    Keeps a set of in-process clients in sync by applying every update one client
+    makes to all the others.
+
+    While the pool applies a diff to a client, `receiving` is set to that client.
+    SyncClient.sync checks it to avoid re-broadcasting diffs it got from the pool, so
+    a custom pool passed to SyncClient must provide and maintain `receiving` as well.
+    """
+
     def __init__(self, client_cls=SyncClient):
         self.clients: List[client_cls] = []
         self.client_cls = client_cls
+        # The client currently having a diff applied by the pool, if any
+        self.receiving: Optional[SyncClient] = None
 
     def create_client(self):
         """
@@ -32,15 +50,28 @@ class ClientPool:
         # - peer sends "sync step 2" with a diff you should apply
         # - you apply the diff and you're synced
         if self.clients:
-            new_client_state: bytes = client.doc.begin_transaction().state_vector_v1()
+            with client.doc.begin_transaction() as txn:
+                new_client_state: bytes = txn.state_vector_v1()
             stateful_ydoc: Y.YDoc = self.clients[0].doc
-            diff: bytes = stateful_ydoc.begin_transaction().diff_v1(new_client_state)
-            client.doc.begin_transaction().apply_v1(diff)
+            with stateful_ydoc.begin_transaction() as txn:
+                diff: bytes = txn.diff_v1(new_client_state)
+            self._apply(client, diff)
         self.clients.append(client)
         return client
 
-    def sync(self, diff: bytes):
+    def sync(self, diff: bytes, origin: Optional[SyncClient] = None):
         # Thanks to idempotency in Y algorithm, we don't need to worry about applying
-        # the same diff multiple times.
+        # the same diff multiple times. The client that produced the diff already has
+        # it though, so skip echoing it back.
         for client in self.clients:
-            client.doc.begin_transaction().apply_v1(diff)
+            if client is origin:
+                continue
+            self._apply(client, diff)
+
+    def _apply(self, client: SyncClient, diff: bytes):
+        self.receiving = client
+        try:
+            with client.doc.begin_transaction() as txn:
+                txn.apply_v1(diff)
+        finally:
+            self.receiving = None
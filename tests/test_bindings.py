@@ -0,0 +1,176 @@
+import json
+
+import pytest
+import y_py as Y
+
+from y_pydantic import ArrayBinding, TextBinding, TextModel
+from y_pydantic.bindings import TextItem
+
+
+@pytest.fixture
+def doc() -> Y.YDoc:
+    return Y.YDoc()
+
+
+@pytest.fixture
+def text(doc: Y.YDoc) -> TextBinding:
+    binding = TextBinding(parent_doc=doc, ytext=doc.get_text("text"), event_history=100)
+    binding.extend("hello")
+    binding.format(1, 2, {"bold": True})
+    binding.delete_range(3, 1)
+    binding.insert_embed(0, {"image": "cat.png"})
+    return binding
+
+
+def replayed(binding: TextBinding) -> TextModel:
+    """
+    A TextModel updated through TextModel.apply_event with every observed event
+    """
+    model = TextModel()
+    for event in binding.events:
+        model.apply_event(event)
+    return model
+
+
+def test_plain_text(text: TextBinding):
+    assert text.plain_text == str(text.ytext) == "helo"
+    assert text.model.plain_text == "helo"
+    assert replayed(text).plain_text == "helo"
+
+
+def test_model_matches_apply_event(text: TextBinding):
+    assert text.model == replayed(text)
+    assert [item.value for item in text.model.deleted] == ["l"]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"exclude": {"deleted"}},
+        {"exclude": {"items"}},
+        {"include": {"deleted"}},
+        {"include": {"items"}},
+        {"include": {"items": {0, 2}}},
+        {"exclude": {"items": {"__all__": {"attributes"}}}},
+        {"include": {"items": {1: {"value"}}}, "exclude": {"deleted"}},
+        {"exclude_defaults": True},
+        {"exclude_none": True},
+        {"exclude_unset": True},
+        {"by_alias": True},
+    ],
+)
+def test_serialization_matches_apply_event(text: TextBinding, kwargs: dict):
+    reference = replayed(text)
+    assert text.model.dict(**kwargs) == reference.dict(**kwargs)
+    assert text.model.json(**kwargs) == reference.json(**kwargs)
+
+
+def test_model_is_rebuilt_after_changes(text: TextBinding):
+    model = text.model
+    assert text.model is model
+    text.extend("!")
+    assert text.model is not model
+    assert text.model.plain_text == "helo!"
+
+
+def test_text_model_is_a_plain_pydantic_model():
+    assert "items" in TextModel.__fields__
+    assert "items" in TextModel.schema()["properties"]
+
+    items = [TextItem(value="a"), TextItem(value=[1]), TextItem(value="b")]
+    assert TextModel(items=items).plain_text == "ab"
+    assert TextModel.construct(items=items).plain_text == "ab"
+
+    model = TextModel(items=items)
+    assert TextModel.parse_raw(model.json()).plain_text == "ab"
+    assert model.copy(update={"items": [TextItem(value="c")]}).plain_text == "c"
+    assert list(dict(model)) == ["items", "deleted"]
+
+    model.items.append(TextItem(value="d"))
+    model.items[0].attributes["bold"] = True
+    assert model.plain_text == "abd"
+    assert model.dict()["items"][0] == {"value": "a", "attributes": {"bold": True}}
+
+    model.items = [TextItem(value="e")]
+    assert model.plain_text == "e"
+
+
+def test_formatting_runs_share_attributes(text: TextBinding):
+    text.insert(0, "xyz", {"italic": True})
+    text.format(1, 1, {"bold": True})
+    assert [item.attributes for item in text.model.items[:3]] == [
+        {"italic": True},
+        {"italic": True, "bold": True},
+        {"italic": True},
+    ]
+    assert text.model == replayed(text)
+
+
+def test_nested_bindings_json(doc: Y.YDoc):
+    array = ArrayBinding(parent_doc=doc, yarray=doc.get_array("array"))
+    array.extend([Y.YText(""), Y.YArray([]), Y.YMap({})])
+    nested_text, nested_array, nested_map = array.model.items
+    nested_text.insert(0, "hi", {"bold": True})
+    nested_array.append(1)
+    nested_map.set("inner", Y.YArray([]))
+    nested_map.model.items["inner"].append(Y.YMap({}))
+    nested_map.model.items["inner"].model.items[0].set("key", "value")
+
+    text_json = {
+        "items": [
+            {"value": "h", "attributes": {"bold": True}},
+            {"value": "i", "attributes": {"bold": True}},
+        ],
+        "deleted": [],
+    }
+    map_json = {
+        "items": {
+            "inner": {
+                "items": [{"items": {"key": "value"}, "deleted": {}}],
+                "deleted": [],
+            }
+        },
+        "deleted": {},
+    }
+    assert json.loads(array.model.json()) == {
+        "items": [text_json, {"items": [1.0], "deleted": []}, map_json],
+        "deleted": [],
+    }
+    assert json.loads(nested_map.model.json()) == map_json
+
+
+def test_binding_methods_join_an_open_batch(doc: Y.YDoc):
+    text = TextBinding(parent_doc=doc, ytext=doc.get_text("text"), event_history=10)
+    text.extend("ab")
+    with text.batch() as ops:
+        ops.extend("1")
+        text.extend("2")
+        with text.batch() as inner:
+            inner.extend("3")
+    assert text.plain_text == str(text.ytext) == "ab123"
+    # One event for the initial extend, one for the whole batch
+    assert len(text.events) == 2
+
+
+def test_batch_is_shared_across_bindings_on_a_doc(doc: Y.YDoc):
+    text = TextBinding(parent_doc=doc, ytext=doc.get_text("text"))
+    array = ArrayBinding(parent_doc=doc, yarray=doc.get_array("array"))
+    text.extend("ab")
+    with array.batch() as ops:
+        ops.append(1)
+        text.extend("1")
+        array.append(2)
+        text.extend("2")
+    assert text.plain_text == str(text.ytext) == "ab12"
+    assert array.model.items == [1.0, 2.0]
+
+
+def test_batch_closes_on_error(doc: Y.YDoc):
+    text = TextBinding(parent_doc=doc, ytext=doc.get_text("text"))
+    with pytest.raises(RuntimeError):
+        with text.batch() as ops:
+            ops.extend("a")
+            raise RuntimeError
+    text.extend("b")
+    assert text.plain_text == str(text.ytext) == "ab"
@@ -0,0 +1,64 @@
+import pytest
+
+from y_pydantic.clients import ClientPool
+
+
+@pytest.fixture
+def pool() -> ClientPool:
+    return ClientPool()
+
+
+def count_applies(pool: ClientPool, monkeypatch) -> list:
+    applied = []
+    apply = pool._apply
+
+    def counting_apply(client, diff):
+        applied.append(client)
+        apply(client, diff)
+
+    monkeypatch.setattr(pool, "_apply", counting_apply)
+    return applied
+
+
+def test_edit_is_applied_once_to_every_other_client(pool, monkeypatch):
+    clients = [pool.create_client() for _ in range(3)]
+    applied = count_applies(pool, monkeypatch)
+
+    origin = clients[0]
+    text = origin.doc.get_text("text")
+    with origin.doc.begin_transaction() as txn:
+        text.extend(txn, "foo")
+    assert applied == clients[1:]
+
+    applied.clear()
+    with origin.doc.begin_transaction() as txn:
+        text.extend(txn, "bar")
+    assert applied == clients[1:]
+
+    for client in clients:
+        assert str(client.doc.get_text("text")) == "foobar"
+
+
+def test_bootstrap_does_not_broadcast(pool, monkeypatch):
+    first = pool.create_client()
+    second = pool.create_client()
+    with first.doc.begin_transaction() as txn:
+        first.doc.get_text("text").extend(txn, "foo")
+
+    applied = count_applies(pool, monkeypatch)
+    third = pool.create_client()
+    # Only the new client gets the bootstrap diff, existing clients are untouched
+    assert applied == [third]
+    assert pool.receiving is None
+    assert str(third.doc.get_text("text")) == "foo"
+    assert pool.clients == [first, second, third]
+
+
+def test_edit_from_bootstrapped_client_syncs(pool):
+    first = pool.create_client()
+    with first.doc.begin_transaction() as txn:
+        first.doc.get_text("text").extend(txn, "foo")
+    second = pool.create_client()
+    with second.doc.begin_transaction() as txn:
+        second.doc.get_text("text").delete_range(txn, 0, 1)
+    assert str(first.doc.get_text("text")) == "oo"